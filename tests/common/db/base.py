@@ -31,3 +31,16 @@ class WarehouseFactory(SQLAlchemyModelFactory):
         session.flush()
         session.expire_all()
         return r
+
+    @classmethod
+    def create_bulk(cls, size, **kwargs):
+        """
+        Build ``size`` instances and INSERT them with a single bulk statement.
+
+        Relationships are not persisted and the instances are not added to the
+        session, so this is only suitable for objects whose column values are
+        all that the caller needs.
+        """
+        objs = cls.build_batch(size, **kwargs)
+        cls._meta.sqlalchemy_session.bulk_save_objects(objs)
+        return objs
@@ -133,6 +133,12 @@ def database(request):
     pg_db = config.get("db", "tests")
     pg_version = config.get("version", 10.1)
 
+    # When the tests are distributed with pytest-xdist, give every worker its
+    # own database so that they don't step on each other.
+    xdist_worker = os.environ.get("PYTEST_XDIST_WORKER")
+    if xdist_worker:
+        pg_db = f"{pg_db}_{xdist_worker}"
+
     janitor = DatabaseJanitor(pg_user, pg_host, pg_port, pg_db, pg_version)
 
     # In case the database already exists, possibly due to an aborted test run,
@@ -201,12 +207,29 @@ def app_config(database):
     return cfg
 
 
-@pytest.fixture
-def db_session(app_config):
+@pytest.fixture(scope="session")
+def db_connection(app_config):
+    # Connecting is comparatively expensive, so share a single connection for
+    # the whole test run and isolate each test within its own transaction.
     engine = app_config.registry["sqlalchemy.engine"]
     conn = engine.connect()
-    trans = conn.begin()
-    session = Session(bind=conn)
+
+    try:
+        yield conn
+    finally:
+        conn.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def db_session(db_connection):
+    # A fixture with a wider scope may have left data in an open transaction on
+    # the shared connection, in which case nest within it rather than replace it.
+    if db_connection.in_transaction():
+        trans = db_connection.begin_nested()
+    else:
+        trans = db_connection.begin()
+    session = Session(bind=db_connection)
 
     # Start the session in a SAVEPOINT
     session.begin_nested()
@@ -223,8 +246,6 @@ def db_session(app_config):
         session.close()
         Session.remove()
         trans.rollback()
-        conn.close()
-        engine.dispose()
 
 
 @pytest.fixture
@@ -11,17 +11,25 @@
 # limitations under the License.
 
 import datetime
+import functools
 
-import elasticsearch
+from operator import attrgetter
+
+import factory
 import pretend
 import pytest
 
+from sqlalchemy import select
+
 from warehouse.legacy.api.xmlrpc import views as xmlrpc
-from warehouse.packaging.models import Classifier
+from warehouse.packaging.models import Classifier, DependencyKind, JournalEntry
 from warehouse.rate_limiting.interfaces import IRateLimiter
 
+from .....common.db import Session
 from .....common.db.accounts import UserFactory
+from .....common.db.classifiers import ClassifierFactory
 from .....common.db.packaging import (
+    DependencyFactory,
     FileFactory,
     JournalEntryFactory,
     ProjectFactory,
@@ -29,6 +37,26 @@ from .....common.db.packaging import (
     RoleFactory,
 )
 
+_EPOCH = datetime.datetime(1970, 1, 1)
+_ONE_SECOND = datetime.timedelta(seconds=1)
+
+
+def _epoch_seconds(dt):
+    # Equivalent to int(dt.replace(tzinfo=utc).timestamp()) for the naive UTC
+    # datetimes stored on journal entries, but without building a new aware
+    # datetime or going through floating point.
+    return (dt - _EPOCH) // _ONE_SECOND
+
+
+_PASSING_LIMITER = pretend.stub(
+    test=lambda *a: True, hit=lambda *a: True, resets_in=lambda *a: None
+)
+_BLOCKING_LIMITER = pretend.stub(
+    test=lambda *a: False, hit=lambda *a: True, resets_in=lambda *a: None
+)
+_FAKE_CONTEXT = pretend.stub()
+_FAKE_URLS = (pretend.stub(), pretend.stub())
+
 
 class TestRateLimiting:
     def test_ratelimiting_pass(self, pyramid_services, pyramid_request, metrics):
@@ -36,15 +64,11 @@ class TestRateLimiting:
             return None
 
         ratelimited_view = xmlrpc.ratelimit()(view)
-        context = pretend.stub()
         pyramid_request.remote_addr = "127.0.0.1"
-        fake_rate_limiter = pretend.stub(
-            test=lambda *a: True, hit=lambda *a: True, resets_in=lambda *a: None
-        )
         pyramid_services.register_service(
-            fake_rate_limiter, IRateLimiter, None, name="xmlrpc.client"
+            _PASSING_LIMITER, IRateLimiter, None, name="xmlrpc.client"
         )
-        ratelimited_view(context, pyramid_request)
+        ratelimited_view(_FAKE_CONTEXT, pyramid_request)
 
         assert metrics.increment.calls == [
             pretend.call("warehouse.xmlrpc.ratelimiter.hit", tags=[])
@@ -55,16 +79,12 @@ class TestRateLimiting:
             return None
 
         ratelimited_view = xmlrpc.ratelimit()(view)
-        context = pretend.stub()
         pyramid_request.remote_addr = "127.0.0.1"
-        fake_rate_limiter = pretend.stub(
-            test=lambda *a: False, hit=lambda *a: True, resets_in=lambda *a: None
-        )
         pyramid_services.register_service(
-            fake_rate_limiter, IRateLimiter, None, name="xmlrpc.client"
+            _BLOCKING_LIMITER, IRateLimiter, None, name="xmlrpc.client"
         )
         with pytest.raises(xmlrpc.XMLRPCWrappedError) as exc:
-            ratelimited_view(context, pyramid_request)
+            ratelimited_view(_FAKE_CONTEXT, pyramid_request)
 
         assert exc.value.faultString == (
             "HTTPTooManyRequests: The action could not be performed because there "
@@ -89,7 +109,6 @@ class TestRateLimiting:
             return None
 
         ratelimited_view = xmlrpc.ratelimit()(view)
-        context = pretend.stub()
         pyramid_request.remote_addr = "127.0.0.1"
         fake_rate_limiter = pretend.stub(
             test=lambda *a: False,
@@ -100,7 +119,7 @@ class TestRateLimiting:
             fake_rate_limiter, IRateLimiter, None, name="xmlrpc.client"
         )
         with pytest.raises(xmlrpc.XMLRPCWrappedError) as exc:
-            ratelimited_view(context, pyramid_request)
+            ratelimited_view(_FAKE_CONTEXT, pyramid_request)
 
         assert exc.value.faultString == (
             "HTTPTooManyRequests: The action could not be performed because there "
@@ -113,6 +132,217 @@ class TestRateLimiting:
         ]
 
 
+class FakeQuery:
+    __slots__ = (
+        "type",
+        "clauses",
+        "expected_clauses",
+        "results",
+        "offset",
+        "limit",
+        "step",
+    )
+
+    def __init__(self, clause_key, expected_clauses, results, type, **clauses):
+        assert list(clauses) == [clause_key]
+        self.type = type
+        self.clauses = clauses[clause_key]
+        self.expected_clauses = expected_clauses
+        self.results = results
+
+    def __getitem__(self, name):
+        self.offset = name.start
+        self.limit = name.stop
+        self.step = name.step
+        return self
+
+    def execute(self):
+        assert self.type == "bool"
+        assert [q.to_dict() for q in self.clauses] == self.expected_clauses
+        assert self.offset is None
+        assert self.limit == 100
+        assert self.step is None
+        return self.results
+
+
+@pytest.fixture
+def fake_es():
+    def make(expected_clauses, results, clause_key="must"):
+        return pretend.stub(
+            query=functools.partial(FakeQuery, clause_key, expected_clauses, results)
+        )
+
+    return make
+
+
+_EXPECTED_FOO_ONE_TWO_CLAUSES = [
+    {"match": {"name": {"query": "foo", "boost": 10}}},
+    {
+        "bool": {
+            "should": [
+                {"match": {"summary": {"query": "one", "boost": 5}}},
+                {"match": {"summary": {"query": "two", "boost": 5}}},
+            ]
+        }
+    },
+]
+_FOO_RESULTS = [
+    pretend.stub(
+        name="foo",
+        summary="my summary",
+        latest_version="1.0",
+        version=["1.0"],
+    ),
+    pretend.stub(
+        name="foo-bar",
+        summary="other summary",
+        latest_version="2.0",
+        version=["2.0", "1.0"],
+    ),
+]
+_EXPECTED_FOO_RESULTS = [
+    {
+        "_pypi_ordering": False,
+        "name": "foo",
+        "summary": "my summary",
+        "version": "1.0",
+    },
+    {
+        "_pypi_ordering": False,
+        "name": "foo-bar",
+        "summary": "other summary",
+        "version": "2.0",
+    },
+]
+
+SEARCH_CASES = (
+    pytest.param(
+        {
+            "args": ({"name": "foo", "summary": ["one", "two"]},),
+            "clause_key": "must",
+            "expected_clauses": _EXPECTED_FOO_ONE_TWO_CLAUSES,
+            "results": _FOO_RESULTS,
+            "expected": _EXPECTED_FOO_RESULTS,
+        },
+        id="default-operator",
+    ),
+    pytest.param(
+        {
+            "args": ({"summary": ["fix code", "like this"]},),
+            "clause_key": "must",
+            "expected_clauses": [
+                {
+                    "bool": {
+                        "should": [
+                            {"match": {"summary": {"boost": 5, "query": "fix code"}}},
+                            {"match": {"summary": {"boost": 5, "query": "like this"}}},
+                        ]
+                    }
+                }
+            ],
+            "results": [
+                pretend.stub(
+                    name="foo",
+                    summary="fix code",
+                    latest_version="1.0",
+                    version=["1.0"],
+                ),
+                pretend.stub(
+                    name="foo-bar",
+                    summary="like this",
+                    latest_version="2.0",
+                    version=["2.0", "1.0"],
+                ),
+            ],
+            "expected": [
+                {
+                    "_pypi_ordering": False,
+                    "name": "foo",
+                    "summary": "fix code",
+                    "version": "1.0",
+                },
+                {
+                    "_pypi_ordering": False,
+                    "name": "foo-bar",
+                    "summary": "like this",
+                    "version": "2.0",
+                },
+            ],
+        },
+        id="default-operator-with-spaces-in-values",
+    ),
+    pytest.param(
+        {
+            "args": ({"name": "foo", "summary": ["one", "two"]}, "and"),
+            "clause_key": "must",
+            "expected_clauses": _EXPECTED_FOO_ONE_TWO_CLAUSES,
+            "results": _FOO_RESULTS,
+            "expected": _EXPECTED_FOO_RESULTS,
+        },
+        id="and",
+    ),
+    pytest.param(
+        {
+            "args": ({"name": "foo", "summary": ["one", "two"]}, "or"),
+            "clause_key": "should",
+            "expected_clauses": _EXPECTED_FOO_ONE_TWO_CLAUSES,
+            "results": _FOO_RESULTS,
+            "expected": _EXPECTED_FOO_RESULTS,
+        },
+        id="or",
+    ),
+    pytest.param(
+        {
+            "args": ({"name": "foo", "version": "1.0"}, "and"),
+            "clause_key": "must",
+            "expected_clauses": [
+                {"match": {"name": {"boost": 10, "query": "foo"}}},
+                {"match": {"version": {"query": "1.0"}}},
+            ],
+            "results": _FOO_RESULTS,
+            "expected": [
+                {
+                    "_pypi_ordering": False,
+                    "name": "foo",
+                    "summary": "my summary",
+                    "version": "1.0",
+                },
+                {
+                    "_pypi_ordering": False,
+                    "name": "foo-bar",
+                    "summary": "other summary",
+                    "version": "1.0",
+                },
+            ],
+        },
+        id="version",
+    ),
+    pytest.param(
+        {
+            "args": ({"name": "foo"}, "and"),
+            "clause_key": "must",
+            "expected_clauses": [{"match": {"name": {"query": "foo", "boost": 10}}}],
+            "results": [
+                pretend.stub(
+                    name="foo",
+                    summary="my summary",
+                    latest_version="1.0",
+                    version=["1.0"],
+                ),
+                pretend.stub(
+                    name="foo-bar",
+                    summary="other summary",
+                    latest_version="2.0",
+                    version=["3.0a1", "2.0", "1.0"],
+                ),
+            ],
+            "expected": _EXPECTED_FOO_RESULTS,
+        },
+        id="version-returns-latest",
+    ),
+)
+
+
 class TestSearch:
     def test_error_when_disabled(self, pyramid_request, metrics, monkeypatch):
         monkeypatch.setattr(
@@ -142,387 +372,20 @@ class TestSearch:
         )
         assert metrics.histogram.calls == []
 
-    def test_default_search_operator(self, pyramid_request, metrics):
-        class FakeQuery:
-            def __init__(self, type, must):
-                self.type = type
-                self.must = must
-
-            def __getitem__(self, name):
-                self.offset = name.start
-                self.limit = name.stop
-                self.step = name.step
-                return self
-
-            def execute(self):
-                assert self.type == "bool"
-                assert [q.to_dict() for q in self.must] == [
-                    {"match": {"name": {"query": "foo", "boost": 10}}},
-                    {
-                        "bool": {
-                            "should": [
-                                {"match": {"summary": {"query": "one", "boost": 5}}},
-                                {"match": {"summary": {"query": "two", "boost": 5}}},
-                            ]
-                        }
-                    },
-                ]
-                assert self.offset is None
-                assert self.limit == 100
-                assert self.step is None
-                return [
-                    pretend.stub(
-                        name="foo",
-                        summary="my summary",
-                        latest_version="1.0",
-                        version=["1.0"],
-                    ),
-                    pretend.stub(
-                        name="foo-bar",
-                        summary="other summary",
-                        latest_version="2.0",
-                        version=["2.0", "1.0"],
-                    ),
-                ]
-
-        pyramid_request.es = pretend.stub(query=FakeQuery)
-        results = xmlrpc.search(
-            pyramid_request, {"name": "foo", "summary": ["one", "two"]}
+    @pytest.mark.parametrize("params", SEARCH_CASES)
+    def test_search(self, pyramid_request, metrics, fake_es, params):
+        pyramid_request.es = fake_es(
+            params["expected_clauses"], params["results"], params["clause_key"]
         )
-        assert results == [
-            {
-                "_pypi_ordering": False,
-                "name": "foo",
-                "summary": "my summary",
-                "version": "1.0",
-            },
-            {
-                "_pypi_ordering": False,
-                "name": "foo-bar",
-                "summary": "other summary",
-                "version": "2.0",
-            },
-        ]
-        assert metrics.histogram.calls == [
-            pretend.call("warehouse.xmlrpc.search.results", 2)
-        ]
-
-    def test_default_search_operator_with_spaces_in_values(
-        self, pyramid_request, metrics
-    ):
-        class FakeQuery:
-            def __init__(self, type, must):
-                self.type = type
-                self.must = must
-
-            def __getitem__(self, name):
-                self.offset = name.start
-                self.limit = name.stop
-                self.step = name.step
-                return self
-
-            def execute(self):
-                assert self.type == "bool"
-                assert [q.to_dict() for q in self.must] == [
-                    {
-                        "bool": {
-                            "should": [
-                                {
-                                    "match": {
-                                        "summary": {"boost": 5, "query": "fix code"}
-                                    }
-                                },
-                                {
-                                    "match": {
-                                        "summary": {"boost": 5, "query": "like this"}
-                                    }
-                                },
-                            ]
-                        }
-                    }
-                ]
-                assert self.offset is None
-                assert self.limit == 100
-                assert self.step is None
-                return [
-                    pretend.stub(
-                        name="foo",
-                        summary="fix code",
-                        latest_version="1.0",
-                        version=["1.0"],
-                    ),
-                    pretend.stub(
-                        name="foo-bar",
-                        summary="like this",
-                        latest_version="2.0",
-                        version=["2.0", "1.0"],
-                    ),
-                ]
-
-        pyramid_request.es = pretend.stub(query=FakeQuery)
-        results = xmlrpc.search(pyramid_request, {"summary": ["fix code", "like this"]})
-        assert results == [
-            {
-                "_pypi_ordering": False,
-                "name": "foo",
-                "summary": "fix code",
-                "version": "1.0",
-            },
-            {
-                "_pypi_ordering": False,
-                "name": "foo-bar",
-                "summary": "like this",
-                "version": "2.0",
-            },
-        ]
-        assert metrics.histogram.calls == [
-            pretend.call("warehouse.xmlrpc.search.results", 2)
-        ]
-
-    def test_searches_with_and(self, pyramid_request, metrics):
-        class FakeQuery:
-            def __init__(self, type, must):
-                self.type = type
-                self.must = must
-
-            def __getitem__(self, name):
-                self.offset = name.start
-                self.limit = name.stop
-                self.step = name.step
-                return self
-
-            def execute(self):
-                assert self.type == "bool"
-                assert [q.to_dict() for q in self.must] == [
-                    {"match": {"name": {"query": "foo", "boost": 10}}},
-                    {
-                        "bool": {
-                            "should": [
-                                {"match": {"summary": {"query": "one", "boost": 5}}},
-                                {"match": {"summary": {"query": "two", "boost": 5}}},
-                            ]
-                        }
-                    },
-                ]
-                assert self.offset is None
-                assert self.limit == 100
-                assert self.step is None
-                return [
-                    pretend.stub(
-                        name="foo",
-                        summary="my summary",
-                        latest_version="1.0",
-                        version=["1.0"],
-                    ),
-                    pretend.stub(
-                        name="foo-bar",
-                        summary="other summary",
-                        latest_version="2.0",
-                        version=["2.0", "1.0"],
-                    ),
-                ]
-
-        pyramid_request.es = pretend.stub(query=FakeQuery)
-        results = xmlrpc.search(
-            pyramid_request, {"name": "foo", "summary": ["one", "two"]}, "and"
-        )
-        assert results == [
-            {
-                "_pypi_ordering": False,
-                "name": "foo",
-                "summary": "my summary",
-                "version": "1.0",
-            },
-            {
-                "_pypi_ordering": False,
-                "name": "foo-bar",
-                "summary": "other summary",
-                "version": "2.0",
-            },
-        ]
-        assert metrics.histogram.calls == [
-            pretend.call("warehouse.xmlrpc.search.results", 2)
-        ]
-
-    def test_searches_with_or(self, pyramid_request, metrics):
-        class FakeQuery:
-            def __init__(self, type, should):
-                self.type = type
-                self.should = should
-
-            def __getitem__(self, name):
-                self.offset = name.start
-                self.limit = name.stop
-                self.step = name.step
-                return self
-
-            def execute(self):
-                assert self.type == "bool"
-                assert [q.to_dict() for q in self.should] == [
-                    {"match": {"name": {"query": "foo", "boost": 10}}},
-                    {
-                        "bool": {
-                            "should": [
-                                {"match": {"summary": {"query": "one", "boost": 5}}},
-                                {"match": {"summary": {"query": "two", "boost": 5}}},
-                            ]
-                        }
-                    },
-                ]
-                assert self.offset is None
-                assert self.limit == 100
-                assert self.step is None
-                return [
-                    pretend.stub(
-                        name="foo",
-                        summary="my summary",
-                        latest_version="1.0",
-                        version=["1.0"],
-                    ),
-                    pretend.stub(
-                        name="foo-bar",
-                        summary="other summary",
-                        latest_version="2.0",
-                        version=["2.0", "1.0"],
-                    ),
-                ]
-
-        pyramid_request.es = pretend.stub(query=FakeQuery)
-        results = xmlrpc.search(
-            pyramid_request, {"name": "foo", "summary": ["one", "two"]}, "or"
-        )
-        assert results == [
-            {
-                "_pypi_ordering": False,
-                "name": "foo",
-                "summary": "my summary",
-                "version": "1.0",
-            },
-            {
-                "_pypi_ordering": False,
-                "name": "foo-bar",
-                "summary": "other summary",
-                "version": "2.0",
-            },
-        ]
-        assert metrics.histogram.calls == [
-            pretend.call("warehouse.xmlrpc.search.results", 2)
-        ]
-
-    def test_version_search(self, pyramid_request, metrics):
-        class FakeQuery:
-            def __init__(self, type, must):
-                self.type = type
-                self.must = must
-
-            def __getitem__(self, name):
-                self.offset = name.start
-                self.limit = name.stop
-                self.step = name.step
-                return self
-
-            def execute(self):
-                assert self.type == "bool"
-                assert [q.to_dict() for q in self.must] == [
-                    {"match": {"name": {"boost": 10, "query": "foo"}}},
-                    {"match": {"version": {"query": "1.0"}}},
-                ]
-                assert self.offset is None
-                assert self.limit == 100
-                assert self.step is None
-                return [
-                    pretend.stub(
-                        name="foo",
-                        summary="my summary",
-                        latest_version="1.0",
-                        version=["1.0"],
-                    ),
-                    pretend.stub(
-                        name="foo-bar",
-                        summary="other summary",
-                        latest_version="2.0",
-                        version=["2.0", "1.0"],
-                    ),
-                ]
-
-        pyramid_request.es = pretend.stub(query=FakeQuery)
-        results = xmlrpc.search(
-            pyramid_request, {"name": "foo", "version": "1.0"}, "and"
-        )
-        assert results == [
-            {
-                "_pypi_ordering": False,
-                "name": "foo",
-                "summary": "my summary",
-                "version": "1.0",
-            },
-            {
-                "_pypi_ordering": False,
-                "name": "foo-bar",
-                "summary": "other summary",
-                "version": "1.0",
-            },
-        ]
-        assert metrics.histogram.calls == [
-            pretend.call("warehouse.xmlrpc.search.results", 2)
-        ]
-
-    def test_version_search_returns_latest(self, pyramid_request, metrics):
-        class FakeQuery:
-            def __init__(self, type, must):
-                self.type = type
-                self.must = must
-
-            def __getitem__(self, name):
-                self.offset = name.start
-                self.limit = name.stop
-                self.step = name.step
-                return self
-
-            def execute(self):
-                assert self.type == "bool"
-                assert [q.to_dict() for q in self.must] == [
-                    {"match": {"name": {"query": "foo", "boost": 10}}}
-                ]
-                assert self.offset is None
-                assert self.limit == 100
-                assert self.step is None
-                return [
-                    pretend.stub(
-                        name="foo",
-                        summary="my summary",
-                        latest_version="1.0",
-                        version=["1.0"],
-                    ),
-                    pretend.stub(
-                        name="foo-bar",
-                        summary="other summary",
-                        latest_version="2.0",
-                        version=["3.0a1", "2.0", "1.0"],
-                    ),
-                ]
-
-        pyramid_request.es = pretend.stub(query=FakeQuery)
-        results = xmlrpc.search(pyramid_request, {"name": "foo"}, "and")
-        assert results == [
-            {
-                "_pypi_ordering": False,
-                "name": "foo",
-                "summary": "my summary",
-                "version": "1.0",
-            },
-            {
-                "_pypi_ordering": False,
-                "name": "foo-bar",
-                "summary": "other summary",
-                "version": "2.0",
-            },
-        ]
+        results = xmlrpc.search(pyramid_request, *params["args"])
+        assert results == params["expected"]
         assert metrics.histogram.calls == [
             pretend.call("warehouse.xmlrpc.search.results", 2)
         ]
 
     def test_version_search_wraps_connection_error(self, pyramid_request, metrics):
+        from elasticsearch import TransportError
+
         class FakeQuery:
             def __init__(self, type, must):
                 pass
@@ -531,7 +394,7 @@ class TestSearch:
                 return self
 
             def execute(self):
-                raise elasticsearch.TransportError()
+                raise TransportError()
 
         pyramid_request.es = pretend.stub(query=FakeQuery)
 
@@ -545,19 +408,21 @@ class TestSearch:
 
 
 def test_list_packages(db_request):
-    projects = [ProjectFactory.create() for _ in range(10)]
+    projects = ProjectFactory.create_bulk(10)
     assert set(xmlrpc.list_packages(db_request)) == {p.name for p in projects}
 
 
 def test_list_packages_with_serial(db_request):
-    projects = [ProjectFactory.create() for _ in range(10)]
+    projects = ProjectFactory.create_bulk(10)
+    entries = JournalEntryFactory.create_bulk(
+        100,
+        name=factory.Iterator([p.name for p in projects for _ in range(10)]),
+        submitted_by=None,
+    )
     expected = {}
-    for project in projects:
-        expected.setdefault(project.name, 0)
-        for _ in range(10):
-            entry = JournalEntryFactory.create(name=project.name)
-            if entry.id > expected[project.name]:
-                expected[project.name] = entry.id
+    for entry in entries:
+        if entry.id > expected.get(entry.name, 0):
+            expected[entry.name] = entry.id
     assert xmlrpc.list_packages_with_serial(db_request) == expected
 
 
@@ -583,13 +448,10 @@ def test_user_packages(db_request):
     for project in unowned_projects:
         RoleFactory.create(project=project, user=other_user)
 
-    assert set(xmlrpc.user_packages(db_request, user.username)) == set(
-        [("Owner", p.name) for p in sorted(owned_projects, key=lambda x: x.name)]
-        + [
-            ("Maintainer", p.name)
-            for p in sorted(maintained_projects, key=lambda x: x.name)
-        ]
-    )
+    expected = {("Owner", p.name) for p in owned_projects} | {
+        ("Maintainer", p.name) for p in maintained_projects
+    }
+    assert set(xmlrpc.user_packages(db_request, user.username)) == expected
 
 
 @pytest.mark.parametrize("num", [None, 1, 5])
@@ -604,35 +466,23 @@ def test_top_packages(num, pyramid_request):
 
 
 @pytest.mark.parametrize("domain", [None, "example.com"])
-def test_package_urls(domain, db_request):
-    db_request.registry.settings = {}
-    if domain:
-        db_request.registry.settings = {"warehouse.domain": domain}
-    db_request.domain = "example.org"
-    with pytest.raises(xmlrpc.XMLRPCWrappedError) as exc:
-        xmlrpc.package_urls(db_request, "foo", "1.0.0")
-
-    assert exc.value.faultString == (
-        "RuntimeError: This API has been deprecated. Use "
-        f"https://{domain if domain else 'example.org'}/foo/1.0.0/json "
-        "instead. The XMLRPC method release_urls can be used in the "
-        "interim, but will be deprecated in the future."
-    )
-
-
-@pytest.mark.parametrize("domain", [None, "example.com"])
-def test_package_data(domain, db_request):
-    db_request.registry.settings = {}
+@pytest.mark.parametrize(
+    ("func", "interim"),
+    [(xmlrpc.package_urls, "release_urls"), (xmlrpc.package_data, "release_data")],
+    ids=["package_urls", "package_data"],
+)
+def test_deprecated_package_api(func, interim, domain, pyramid_request):
+    pyramid_request.registry.settings = {}
     if domain:
-        db_request.registry.settings = {"warehouse.domain": domain}
-    db_request.domain = "example.org"
+        pyramid_request.registry.settings = {"warehouse.domain": domain}
+    pyramid_request.domain = "example.org"
     with pytest.raises(xmlrpc.XMLRPCWrappedError) as exc:
-        xmlrpc.package_data(db_request, "foo", "1.0.0")
+        func(pyramid_request, "foo", "1.0.0")
 
     assert exc.value.faultString == (
         "RuntimeError: This API has been deprecated. Use "
         f"https://{domain if domain else 'example.org'}/foo/1.0.0/json "
-        "instead. The XMLRPC method release_data can be used in the "
+        f"instead. The XMLRPC method {interim} can be used in the "
         "interim, but will be deprecated in the future."
     )
 
@@ -647,7 +497,7 @@ def test_package_releases(db_request):
         result
         == [
             r.version
-            for r in reversed(sorted(releases1, key=lambda x: x._pypi_ordering))
+            for r in sorted(releases1, key=attrgetter("_pypi_ordering"), reverse=True)
         ][:1]
     )
 
@@ -659,7 +509,8 @@ def test_package_releases_hidden(db_request):
     [ReleaseFactory.create(project=project2) for _ in range(10)]
     result = xmlrpc.package_releases(db_request, project1.name, show_hidden=True)
     assert result == [
-        r.version for r in reversed(sorted(releases1, key=lambda x: x._pypi_ordering))
+        r.version
+        for r in sorted(releases1, key=attrgetter("_pypi_ordering"), reverse=True)
     ]
 
 
@@ -683,15 +534,32 @@ def test_release_data_no_release(db_request):
     assert xmlrpc.release_data(db_request, project.name, "1.0") == {}
 
 
-def test_release_data(db_request):
+def test_release_data(db_request, query_recorder):
     project = ProjectFactory.create()
-    release = ReleaseFactory.create(project=project)
+    release = ReleaseFactory.create(
+        project=project,
+        _classifiers=[
+            ClassifierFactory.create(classifier="Environment :: Other Environment"),
+            ClassifierFactory.create(classifier="Programming Language :: Python"),
+        ],
+    )
+    for kind in DependencyKind:
+        DependencyFactory.create(
+            release=release, kind=kind.value, specifier=f"{kind.name}-spec"
+        )
 
-    urls = [pretend.stub(), pretend.stub()]
+    urls = _FAKE_URLS
     urls_iter = iter(urls)
     db_request.route_url = pretend.call_recorder(lambda r, **kw: next(urls_iter))
 
-    assert xmlrpc.release_data(db_request, project.name, release.version) == {
+    name, version = project.name, release.version
+    with query_recorder:
+        result = xmlrpc.release_data(db_request, name, version)
+
+    # The release, its project and description, then its classifiers and all
+    # of its dependencies.
+    assert len(query_recorder.queries) == 3
+    assert result == {
         "name": release.project.name,
         "version": release.version,
         "stable_version": None,
@@ -741,7 +609,7 @@ def test_release_urls(db_request):
         python_version="source",
     )
 
-    urls = [pretend.stub()]
+    urls = _FAKE_URLS[:1]
     urls_iter = iter(urls)
     db_request.route_url = pretend.call_recorder(lambda r, **kw: next(urls_iter))
 
@@ -793,66 +661,57 @@ def test_changelog_last_serial_none(db_request):
 
 
 def test_changelog_last_serial(db_request):
-    projects = [ProjectFactory.create() for _ in range(10)]
-    entries = []
+    projects = ProjectFactory.create_bulk(10)
     for project in projects:
-        for _ in range(10):
-            entries.append(JournalEntryFactory.create(name=project.name))
+        JournalEntryFactory.create_bulk(10, name=project.name, submitted_by=None)
 
-    expected = max(e.id for e in entries)
+    expected = db_request.db.scalar(
+        select(JournalEntry.id).order_by(JournalEntry.id.desc()).limit(1)
+    )
 
     assert xmlrpc.changelog_last_serial(db_request) == expected
 
 
 def test_changelog_since_serial(db_request):
-    projects = [ProjectFactory.create() for _ in range(10)]
+    projects = ProjectFactory.create_bulk(10)
     entries = []
     for project in projects:
-        for _ in range(10):
-            entries.append(JournalEntryFactory.create(name=project.name))
+        entries.extend(
+            JournalEntryFactory.create_bulk(10, name=project.name, submitted_by=None)
+        )
 
+    half = len(entries) // 2
     expected = [
-        (
-            e.name,
-            e.version,
-            int(e.submitted_date.replace(tzinfo=datetime.timezone.utc).timestamp()),
-            e.action,
-            e.id,
-        )
-        for e in entries
-    ][int(len(entries) / 2) :]
+        (e.name, e.version, _epoch_seconds(e.submitted_date), e.action, e.id)
+        for e in entries[half:]
+    ]
 
-    serial = entries[int(len(entries) / 2) - 1].id
+    serial = entries[half - 1].id
 
     assert xmlrpc.changelog_since_serial(db_request, serial) == expected
 
 
 @pytest.mark.parametrize("with_ids", [True, False, None])
 def test_changelog(db_request, with_ids):
-    projects = [ProjectFactory.create() for _ in range(10)]
+    projects = ProjectFactory.create_bulk(10)
     entries = []
     for project in projects:
-        for _ in range(10):
-            entries.append(JournalEntryFactory.create(name=project.name))
+        entries.extend(
+            JournalEntryFactory.create_bulk(10, name=project.name, submitted_by=None)
+        )
 
     entries = sorted(entries, key=lambda x: x.id)
 
-    since = int(
-        entries[int(len(entries) / 2)]
-        .submitted_date.replace(tzinfo=datetime.timezone.utc)
-        .timestamp()
-    )
+    # Convert each submitted date once, and filter on the converted value.
+    utc = datetime.timezone.utc
+    timestamps = [e.submitted_date.replace(tzinfo=utc).timestamp() for e in entries]
+
+    since = int(timestamps[len(entries) // 2])
 
     expected = [
-        (
-            e.name,
-            e.version,
-            int(e.submitted_date.replace(tzinfo=datetime.timezone.utc).timestamp()),
-            e.action,
-            e.id,
-        )
-        for e in entries
-        if (e.submitted_date.replace(tzinfo=datetime.timezone.utc).timestamp() > since)
+        (e.name, e.version, int(ts), e.action, e.id)
+        for e, ts in zip(entries, timestamps)
+        if ts > since
     ]
 
     if not with_ids:
@@ -862,76 +721,101 @@ def test_changelog(db_request, with_ids):
     if with_ids is not None:
         extra_args.append(with_ids)
 
-    assert xmlrpc.changelog(db_request, since, *extra_args) == expected
+    result = xmlrpc.changelog(db_request, since, *extra_args)
 
+    assert len(result) == len(expected)
+    assert result == expected
 
-def test_browse(db_request):
-    classifiers = [
-        Classifier(classifier="Environment :: Other Environment"),
-        Classifier(classifier="Development Status :: 5 - Production/Stable"),
-        Classifier(classifier="Programming Language :: Python"),
-    ]
-    for classifier in classifiers:
-        db_request.db.add(classifier)
 
-    projects = [ProjectFactory.create() for _ in range(3)]
-    releases = []
-    for project in projects:
-        for _ in range(10):
-            releases.append(
-                ReleaseFactory.create(project=project, _classifiers=[classifiers[0]])
-            )
+BROWSE_CLASSIFIERS = (
+    "Environment :: Other Environment",
+    "Development Status :: 5 - Production/Stable",
+    "Programming Language :: Python",
+)
 
-    releases = sorted(releases, key=lambda x: (x.project.name, x.version))
 
-    expected_release = releases[0]
-    expected_release._classifiers = classifiers
+class TestBrowse:
+    @pytest.fixture(scope="class")
+    def browse_corpus(self, db_connection):
+        # Building the projects and releases is the bulk of test_browse, so do it
+        # once for the class, in a transaction that every test's db_session nests
+        # within and which is rolled back as soon as the class is done, before any
+        # other test can see it.
+        trans = db_connection.begin()
+
+        # Roll back however this ends, including a failed build, so that a broken
+        # corpus can't leave the shared connection in an aborted transaction.
+        try:
+            session = Session(bind=db_connection)
+
+            try:
+                classifiers = [
+                    Classifier(classifier=classifier)
+                    for classifier in BROWSE_CLASSIFIERS
+                ]
+                session.add_all(classifiers)
+
+                projects = [ProjectFactory.create() for _ in range(3)]
+                releases = []
+                for project in projects:
+                    # Only build the releases here, so that they're all inserted by
+                    # a single flush instead of being created and flushed one at a
+                    # time.
+                    releases.extend(
+                        ReleaseFactory.build_batch(
+                            10, project=project, _classifiers=[classifiers[0]]
+                        )
+                    )
+                session.add_all(releases)
+
+                releases = sorted(releases, key=lambda x: (x.project.name, x.version))
+
+                expected_release = releases[0]
+                expected_release._classifiers = classifiers
+                session.flush()
+
+                # The instances are detached once this session is closed, so hand
+                # the tests the plain values that they compare against instead.
+                corpus = {
+                    "all": [(r.project.name, r.version) for r in releases],
+                    "expected_release": [
+                        (expected_release.project.name, expected_release.version)
+                    ],
+                }
+            finally:
+                session.close()
+                Session.remove()
+
+            yield corpus
+        finally:
+            trans.rollback()
+
+        # Nothing may be left open on the shared connection for the corpus to leak
+        # into whichever tests run next, in whatever order they are run.
+        assert not db_connection.in_transaction()
 
-    assert set(xmlrpc.browse(db_request, ["Environment :: Other Environment"])) == {
-        (r.project.name, r.version) for r in releases
-    }
-    assert (
-        set(
-            xmlrpc.browse(
-                db_request,
-                [
-                    "Environment :: Other Environment",
-                    "Development Status :: 5 - Production/Stable",
-                ],
-            )
-        )
-        == {(expected_release.project.name, expected_release.version)}
-    )
-    assert (
-        set(
-            xmlrpc.browse(
-                db_request,
-                [
-                    "Environment :: Other Environment",
-                    "Development Status :: 5 - Production/Stable",
-                    "Programming Language :: Python",
-                ],
-            )
-        )
-        == {(expected_release.project.name, expected_release.version)}
-    )
-    assert (
-        set(
-            xmlrpc.browse(
-                db_request,
-                [
-                    "Development Status :: 5 - Production/Stable",
-                    "Programming Language :: Python",
-                ],
-            )
-        )
-        == {(expected_release.project.name, expected_release.version)}
+    @pytest.mark.parametrize(
+        ("classifiers", "expected"),
+        [
+            pytest.param(list(BROWSE_CLASSIFIERS[:1]), "all", id="shared"),
+            pytest.param(list(BROWSE_CLASSIFIERS[:2]), "expected_release", id="two"),
+            pytest.param(list(BROWSE_CLASSIFIERS), "expected_release", id="all-three"),
+            pytest.param(
+                list(BROWSE_CLASSIFIERS[1:]),
+                "expected_release",
+                id="two-without-shared",
+            ),
+        ],
     )
+    def test_browse(self, db_request, browse_corpus, classifiers, expected):
+        # The corpus is sorted in Python, so sort the results the same way rather
+        # than relying on the database collation agreeing with it.
+        assert sorted(xmlrpc.browse(db_request, classifiers)) == browse_corpus[expected]
 
 
-def test_multicall(pyramid_request):
+def test_multicall():
     with pytest.raises(xmlrpc.XMLRPCWrappedError) as exc:
-        xmlrpc.multicall(pyramid_request, [])
+        xmlrpc.multicall(pretend.stub(), [])
 
     assert exc.value.faultString == (
         "ValueError: MultiCall requests have been deprecated, use individual "
@@ -940,7 +824,12 @@ def test_multicall(pyramid_request):
 
 
 @pytest.mark.parametrize(
-    "string, expected", [("Hello…", "Hello&#8230;"), ("Stripe\x1b", "Stripe")]
+    "string, expected",
+    [
+        ("Hello…", "Hello&#8230;"),
+        ("Stripe\x1b", "Stripe"),
+        ("\x00Both…\x7f", "Both&#8230;"),
+    ],
 )
 def test_clean_for_xml(string, expected):
     assert xmlrpc._clean_for_xml(string) == expected
@@ -10,9 +10,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
 import datetime
 import functools
-import re
 import xmlrpc.client
 import xmlrpc.server
 
@@ -32,19 +32,19 @@ from pyramid_rpc.xmlrpc import (
     exception_view as _exception_view,
     xmlrpc_method as _xmlrpc_method,
 )
-from sqlalchemy import func, orm, select
+from sqlalchemy import func, orm
 from sqlalchemy.orm.exc import NoResultFound
 
 from warehouse.accounts.models import User
 from warehouse.classifiers.models import Classifier
 from warehouse.metrics import IMetricsService
 from warehouse.packaging.models import (
+    DependencyKind,
     File,
     JournalEntry,
     Project,
     Release,
     Role,
-    release_classifiers,
 )
 from warehouse.rate_limiting import IRateLimiter
 from warehouse.search.queries import SEARCH_BOOSTS
@@ -75,7 +75,11 @@ _illegal_ranges = [
     "\U000ffffe-\U000fffff",
     "\U0010fffe-\U0010ffff",
 ]
-_illegal_xml_chars_re = re.compile("[%s]" % "".join(_illegal_ranges))
+# Everything outside of ASCII gets turned into a character reference before it
+# could be removed, so only the ASCII characters in these ranges are deleted.
+_illegal_xml_chars = bytes(
+    cp for r in _illegal_ranges for cp in range(ord(r[0]), ord(r[2]) + 1) if cp < 0x80
+)
 
 
 def _clean_for_xml(data):
@@ -84,10 +88,10 @@ def _clean_for_xml(data):
     # If data is None or an empty string, don't bother
     if data:
         # This turns a string like "Hello…" into "Hello&#8230;"
-        data = data.encode("ascii", "xmlcharrefreplace").decode("ascii")
+        data = data.encode("ascii", "xmlcharrefreplace")
         # However it's still possible that there are invalid characters in the string,
         # so simply remove any of those characters
-        return _illegal_xml_chars_re.sub("", data)
+        return data.translate(None, _illegal_xml_chars).decode("ascii")
     return data
 
 
@@ -177,6 +181,18 @@ xmlrpc_cache_all_projects = functools.partial(
 )
 
 
+# Mirrors tend to poll with the same since, so briefly cache each response. The
+# cache is not purged on new journal entries; anything missed is returned once a
+# client polls again with the latest timestamp that it has seen.
+xmlrpc_cache_changelog = functools.partial(
+    xmlrpc_method,
+    xmlrpc_cache=True,
+    xmlrpc_cache_expires=15,  # 15 seconds
+    xmlrpc_cache_tag="changelog/%s",
+    xmlrpc_cache_arg_index=0,
+)
+
+
 class XMLRPCServiceUnavailable(XmlRpcError):
     # NOQA due to N815 'mixedCase variable in class scope',
     # This is the interface for specifying fault code and string for XmlRpcError
@@ -404,7 +420,12 @@ def release_data(request, package_name: str, version: str):
     try:
         release = (
             request.db.query(Release)
-            .options(orm.joinedload(Release.description))
+            .options(
+                orm.joinedload(Release.description),
+                orm.contains_eager(Release.project),
+                orm.selectinload(Release._classifiers),
+                orm.selectinload(Release.dependencies),
+            )
             .join(Project)
             .filter(
                 (Project.normalized_name == func.normalize_pep426_name(package_name))
@@ -415,6 +436,12 @@ def release_data(request, package_name: str, version: str):
     except NoResultFound:
         return {}
 
+    # Group the already loaded dependencies by kind, instead of lazily loading
+    # each of the per-kind relationships with a query of its own.
+    dependencies = collections.defaultdict(list)
+    for dependency in release.dependencies:
+        dependencies[dependency.kind].append(dependency.specifier)
+
     return {
         "name": release.project.name,
         "version": release.version,
@@ -429,7 +456,9 @@ def release_data(request, package_name: str, version: str):
         "docs_url": _clean_for_xml(release.project.documentation_url),
         "home_page": _clean_for_xml(release.home_page),
         "download_url": _clean_for_xml(release.download_url),
-        "project_url": [_clean_for_xml(url) for url in release.project_urls],
+        "project_url": [
+            _clean_for_xml(url) for url in dependencies[DependencyKind.project_url]
+        ],
         "author": _clean_for_xml(release.author),
         "author_email": _clean_for_xml(release.author_email),
         "maintainer": _clean_for_xml(release.maintainer),
@@ -440,14 +469,14 @@ def release_data(request, package_name: str, version: str):
         "keywords": _clean_for_xml(release.keywords),
         "platform": release.platform,
         "classifiers": list(release.classifiers),
-        "requires": list(release.requires),
-        "requires_dist": list(release.requires_dist),
-        "provides": list(release.provides),
-        "provides_dist": list(release.provides_dist),
-        "obsoletes": list(release.obsoletes),
-        "obsoletes_dist": list(release.obsoletes_dist),
+        "requires": dependencies[DependencyKind.requires],
+        "requires_dist": dependencies[DependencyKind.requires_dist],
+        "provides": dependencies[DependencyKind.provides],
+        "provides_dist": dependencies[DependencyKind.provides_dist],
+        "obsoletes": dependencies[DependencyKind.obsoletes],
+        "obsoletes_dist": dependencies[DependencyKind.obsoletes_dist],
         "requires_python": release.requires_python,
-        "requires_external": list(release.requires_external),
+        "requires_external": dependencies[DependencyKind.requires_external],
         "_pypi_ordering": release._pypi_ordering,
         "downloads": {"last_day": -1, "last_week": -1, "last_month": -1},
         "cheesecake_code_kwalitee_id": None,
@@ -545,11 +574,19 @@ def changelog_since_serial(request, serial: int):
     ]
 
 
-@xmlrpc_method(method="changelog")
+@xmlrpc_cache_changelog(method="changelog")
 def changelog(request, since: int, with_ids: bool = False):
     since = datetime.datetime.utcfromtimestamp(since)
+    # Only select the columns that are returned, which lets this be answered by
+    # an index only scan of journals_changelog_covering_idx.
     entries = (
-        request.db.query(JournalEntry)
+        request.db.query(
+            JournalEntry.name,
+            JournalEntry.version,
+            JournalEntry.submitted_date,
+            JournalEntry.action,
+            JournalEntry.id,
+        )
         .filter(JournalEntry.submitted_date > since)
         .order_by(JournalEntry.id)
         .limit(50000)
@@ -574,24 +611,15 @@ def changelog(request, since: int, with_ids: bool = False):
 
 @xmlrpc_method(method="browse")
 def browse(request, classifiers: List[str]):
-    classifiers_q = (
-        request.db.query(Classifier)
-        .filter(Classifier.classifier.in_(classifiers))
-        .subquery()
-    )
-
-    release_classifiers_q = (
-        select([release_classifiers])
-        .where(release_classifiers.c.trove_id == classifiers_q.c.id)
-        .alias("rc")
-    )
-
+    # A release matches when it has every one of the requested classifiers, so
+    # count how many of them each release has and keep those that have them all.
     releases = (
         request.db.query(Project.name, Release.version)
         .join(Release)
-        .join(release_classifiers_q, Release.id == release_classifiers_q.c.release_id)
-        .group_by(Project.name, Release.version)
-        .having(func.count() == len(classifiers))
+        .join(Release._classifiers)
+        .filter(Classifier.classifier.in_(classifiers))
+        .group_by(Release.id, Project.name, Release.version)
+        .having(func.count(Classifier.id) == len(classifiers))
         .order_by(Project.name, Release.version)
         .all()
     )
@@ -0,0 +1,52 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Add covering changelog index
+
+Revision ID: 0cb51a600b59
+Revises: 1b97443dea8a
+Create Date: 2026-10-14 18:40:12.318842
+"""
+
+from alembic import op
+
+revision = "0cb51a600b59"
+down_revision = "1b97443dea8a"
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot happen inside a transaction. We'll close
+    # our transaction here and issue the statement.
+    op.execute("COMMIT")
+
+    op.create_index(
+        "journals_changelog_covering_idx",
+        "journals",
+        ["submitted_date", "name", "version", "action", "id"],
+        unique=False,
+        postgresql_concurrently=True,
+    )
+    # The new index has the old one as a prefix, so it can serve every query
+    # that the old one did.
+    op.drop_index(
+        "journals_changelog", table_name="journals", postgresql_concurrently=True
+    )
+
+
+def downgrade():
+    op.create_index(
+        "journals_changelog",
+        "journals",
+        ["submitted_date", "name", "version", "action"],
+        unique=False,
+    )
+    op.drop_index("journals_changelog_covering_idx", table_name="journals")
@@ -0,0 +1,51 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Add release_classifiers browse index
+
+Revision ID: 5a1c9e0f7d3b
+Revises: 0cb51a600b59
+Create Date: 2026-10-14 19:02:47.904316
+"""
+
+from alembic import op
+
+revision = "5a1c9e0f7d3b"
+down_revision = "0cb51a600b59"
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot happen inside a transaction. We'll close
+    # our transaction here and issue the statement.
+    op.execute("COMMIT")
+
+    op.create_index(
+        "rel_class_trove_id_release_id_idx",
+        "release_classifiers",
+        ["trove_id", "release_id"],
+        unique=False,
+        postgresql_concurrently=True,
+    )
+    # The new index has the old one as a prefix, so it can serve every query
+    # that the old one did.
+    op.drop_index(
+        "rel_class_trove_id_idx",
+        table_name="release_classifiers",
+        postgresql_concurrently=True,
+    )
+
+
+def downgrade():
+    op.create_index(
+        "rel_class_trove_id_idx", "release_classifiers", ["trove_id"], unique=False
+    )
+    op.drop_index("rel_class_trove_id_release_id_idx", table_name="release_classifiers")
@@ -597,7 +597,7 @@ release_classifiers = Table(
         nullable=False,
     ),
     Column("trove_id", Integer(), ForeignKey("trove_classifiers.id")),
-    Index("rel_class_trove_id_idx", "trove_id"),
+    Index("rel_class_trove_id_release_id_idx", "trove_id", "release_id"),
     Index("rel_class_release_id_idx", "release_id"),
 )
 
@@ -609,7 +609,14 @@ class JournalEntry(db.ModelBase):
     @declared_attr
     def __table_args__(cls):  # noqa
         return (
-            Index("journals_changelog", "submitted_date", "name", "version", "action"),
+            Index(
+                "journals_changelog_covering_idx",
+                "submitted_date",
+                "name",
+                "version",
+                "action",
+                "id",
+            ),
             Index("journals_name_idx", "name"),
             Index("journals_version_idx", "version"),
             Index("journals_submitted_by_idx", "submitted_by"),